@@ -7,18 +7,25 @@ Optionally forwards data to HSBI Smart Data API.
 Database setup is handled separately by db_setup.py.
 """
 
-import csv
+import atexit
 import os
 import sys
-import time
+import threading
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from dataclasses import dataclass
 from typing import Optional
 
+import orjson
 import requests
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from requests.adapters import HTTPAdapter, Retry
 import mysql.connector
 from mysql.connector import Error as MySQLError
+from mysql.connector import pooling
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -32,12 +39,13 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Config:
     """Application configuration from environment variables."""
-    
+
     # Airly API
     airly_api_key: str
+    airly_api_url: str
     installation_id: int
     latitude: float
     longitude: float
@@ -45,7 +53,8 @@ class Config:
     
     # Collection settings
     interval_seconds: int
-    
+    batch_size: int
+
     # Database
     db_host: str
     db_port: int
@@ -73,41 +82,54 @@ class Config:
     @classmethod
     def from_env(cls) -> "Config":
         """Load configuration from environment variables."""
+        env = os.environ.get
+        installation_id = int(env("INSTALLATION_ID", "3387"))
+
+        # Precomputed once: the URL never changes after startup. Wind and
+        # forecast data are never used, so ask the API not to send them;
+        # history stays because parse_measurement falls back to it
+        airly_api_url = (
+            "https://airapi.airly.eu/v2/measurements/installation"
+            f"?installationId={installation_id}"
+            "&includeWind=false&includeForecast=false"
+        )
+
         return cls(
-            airly_api_key=os.getenv("AIRLY_API_KEY", ""),
-            installation_id=int(os.getenv("INSTALLATION_ID", "3387")),
-            latitude=float(os.getenv("LATITUDE", "54.3520")),
-            longitude=float(os.getenv("LONGITUDE", "18.6466")),
-            city_name=os.getenv("CITY_NAME", "Gdansk"),
-            interval_seconds=int(os.getenv("INTERVAL_SECONDS", "3600")),
-            db_host=os.getenv("DB_HOST", "localhost"),
-            db_port=int(os.getenv("DB_PORT", "3306")),
-            db_name=os.getenv("DB_NAME", "airly"),
-            db_user=os.getenv("DB_USER", "airly"),
-            db_password=os.getenv("DB_PASSWORD", "airly_pass"),
-            enable_database=os.getenv("ENABLE_DATABASE", "true").lower() == "true",
-            db_ssl_ca=os.getenv("DB_SSL_CA"),
-            db_ssl_cert=os.getenv("DB_SSL_CERT"),
-            db_ssl_key=os.getenv("DB_SSL_KEY"),
-            csv_file=os.getenv("CSV_FILE", "/data/airly_gdansk.csv"),
-            enable_csv=os.getenv("ENABLE_CSV", "false").lower() == "true",
-            hsbi_api_url=os.getenv("HSBI_API_URL", ""),
-            hsbi_sensor_id=int(os.getenv("HSBI_SENSOR_ID", "1")),
-            hsbi_altitude=float(os.getenv("HSBI_ALTITUDE", "10.0")),
-            hsbi_verify_ssl=os.getenv("HSBI_VERIFY_SSL", "true").lower() == "true",
-            enable_hsbi=os.getenv("ENABLE_HSBI_API", "false").lower() == "true",
+            airly_api_key=env("AIRLY_API_KEY", ""),
+            airly_api_url=airly_api_url,
+            installation_id=installation_id,
+            latitude=float(env("LATITUDE", "54.3520")),
+            longitude=float(env("LONGITUDE", "18.6466")),
+            city_name=env("CITY_NAME", "Gdansk"),
+            interval_seconds=int(env("INTERVAL_SECONDS", "3600")),
+            batch_size=int(env("BATCH_SIZE", "1")),
+            db_host=env("DB_HOST", "localhost"),
+            db_port=int(env("DB_PORT", "3306")),
+            db_name=env("DB_NAME", "airly"),
+            db_user=env("DB_USER", "airly"),
+            db_password=env("DB_PASSWORD", "airly_pass"),
+            enable_database=env("ENABLE_DATABASE", "true").lower() == "true",
+            db_ssl_ca=env("DB_SSL_CA"),
+            db_ssl_cert=env("DB_SSL_CERT"),
+            db_ssl_key=env("DB_SSL_KEY"),
+            csv_file=env("CSV_FILE", "/data/airly_gdansk.csv"),
+            enable_csv=env("ENABLE_CSV", "false").lower() == "true",
+            hsbi_api_url=env("HSBI_API_URL", ""),
+            hsbi_sensor_id=int(env("HSBI_SENSOR_ID", "1")),
+            hsbi_altitude=float(env("HSBI_ALTITUDE", "10.0")),
+            hsbi_verify_ssl=env("HSBI_VERIFY_SSL", "true").lower() == "true",
+            enable_hsbi=env("ENABLE_HSBI_API", "false").lower() == "true",
         )
-    
-    @property
-    def airly_api_url(self) -> str:
-        return f"https://airapi.airly.eu/v2/measurements/installation?installationId={self.installation_id}"
 
 
-@dataclass
+@dataclass(slots=True)
 class Measurement:
     """Air quality measurement data."""
-    
+
     timestamp: datetime
+    timestamp_str: str
+    hour_utc: int
+    minute_utc: int
     city: str
     latitude: float
     longitude: float
@@ -118,31 +140,66 @@ class Measurement:
     pressure: Optional[float] = None
     aqi: Optional[float] = None
     station_id: Optional[int] = None
-    
-    @property
-    def hour_utc(self) -> int:
-        return self.timestamp.hour
-    
-    @property
-    def minute_utc(self) -> int:
-        return self.timestamp.minute
-    
-    def to_csv_row(self) -> list:
-        """Convert to CSV row format."""
-        return [
-            self.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+
+    @classmethod
+    def create(cls, config: Config, values: dict, aqi: Optional[float]) -> "Measurement":
+        """Build a measurement stamped with the current UTC time.
+
+        The timestamp string and hour/minute are computed once here so the
+        CSV, database and HSBI paths don't each redo the strftime.
+        """
+        ts = datetime.now(timezone.utc).replace(tzinfo=None)
+        return cls(
+            timestamp=ts,
+            timestamp_str=ts.strftime("%Y-%m-%d %H:%M:%S"),
+            hour_utc=ts.hour,
+            minute_utc=ts.minute,
+            city=config.city_name,
+            latitude=config.latitude,
+            longitude=config.longitude,
+            pm25=values.get("PM25"),
+            pm10=values.get("PM10"),
+            temperature=values.get("TEMPERATURE"),
+            humidity=values.get("HUMIDITY"),
+            pressure=values.get("PRESSURE"),
+            aqi=aqi,
+            station_id=config.installation_id
+        )
+
+    def as_db_row(self) -> tuple:
+        """Parameter tuple for INSERT_SQL, in column order."""
+        return (
+            self.timestamp,
             self.city,
             self.latitude,
             self.longitude,
             self.hour_utc,
             self.minute_utc,
-            self.pm25 if self.pm25 is not None else "",
-            self.pm10 if self.pm10 is not None else "",
-            self.temperature if self.temperature is not None else "",
-            self.humidity if self.humidity is not None else "",
-            self.pressure if self.pressure is not None else "",
-            self.aqi if self.aqi is not None else "",
-        ]
+            self.pm25,
+            self.pm10,
+            self.temperature,
+            self.humidity,
+            self.pressure,
+            self.aqi,
+            self.station_id
+        )
+
+    def to_csv_line(self) -> bytes:
+        """Format as one CSV line, ready for a single append write."""
+        # City is the only free-text field; quote it like csv.writer
+        # would so a comma or quote in CITY_NAME can't corrupt the file
+        city = self.city
+        if any(ch in city for ch in ',"\r\n'):
+            city = '"' + city.replace('"', '""') + '"'
+        optional = ",".join(
+            "" if v is None else str(v)
+            for v in (self.pm25, self.pm10, self.temperature,
+                      self.humidity, self.pressure, self.aqi)
+        )
+        return (
+            f"{self.timestamp_str},{city},{self.latitude},{self.longitude},"
+            f"{self.hour_utc},{self.minute_utc},{optional}\n"
+        ).encode()
 
 
 class AirlyCollector:
@@ -152,10 +209,91 @@ class AirlyCollector:
         "datetime_utc", "city", "lat", "lon", "hour_utc", "minute_utc",
         "PM25", "PM10", "TEMPERATURE", "HUMIDITY", "PRESSURE", "AQI"
     ]
-    
+
+    INSERT_SQL = """
+        INSERT INTO measurements
+        (datetime_utc, city, lat, lon, hour_utc, minute_utc,
+         pm25, pm10, temperature, humidity, pressure, aqi, station_id)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+
     def __init__(self, config: Config):
         self.config = config
-    
+        self._pool: Optional[pooling.MySQLConnectionPool] = None
+
+        # Runs the independent sinks (database, CSV, HSBI) concurrently,
+        # so a cycle costs the slowest sink rather than the sum of all three
+        self._executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="sink")
+
+        # Measurements buffered until a batch of config.batch_size is full;
+        # long-lived CSV descriptor opened lazily by save_to_csv
+        self._buffer: list = []
+        self._csv_fd: Optional[int] = None
+        atexit.register(self.flush)
+
+        # Reused HTTP session: keeps connections alive so the TLS handshake
+        # is paid once, not on every fetch/forward
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=4,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if config.airly_api_key:
+            self.session.headers["apikey"] = config.airly_api_key
+
+        # HSBI payload template: the constant fields (sensor id, position,
+        # particle counts) are built once; send_to_hsbi only overwrites the
+        # per-measurement values on a copy
+        self._hsbi_template = {
+            "id": config.hsbi_sensor_id,
+            "ts": "",
+            "pos": f"POINTZ({config.latitude} {config.longitude} {config.hsbi_altitude})",
+            "temp": 0,
+            "hum": 0,
+            "pres": 0,
+            "mass_pm2_5": 0,
+            "mass_pm10": 0,
+            "mass_pm1_0": 0,
+            "mass_pm4": 0,
+            "number_pm0_5": 0,
+            "number_pm1_0": 0,
+            "number_pm2_5": 0,
+            "number_pm4": 0,
+            "number_pm10": 0
+        }
+
+    def _get_pool(self) -> pooling.MySQLConnectionPool:
+        """Get (lazily creating) the database connection pool."""
+        if self._pool is None:
+            conn_config = {
+                "host": self.config.db_host,
+                "port": self.config.db_port,
+                "database": self.config.db_name,
+                "user": self.config.db_user,
+                "password": self.config.db_password,
+                "connect_timeout": 10,
+                # Use the connector's C extension when built in
+                "use_pure": not mysql.connector.HAVE_CEXT
+            }
+
+            # Add SSL configuration if certificates are available
+            if self.config.db_ssl_ca and self.config.db_ssl_cert and self.config.db_ssl_key:
+                conn_config["ssl_ca"] = self.config.db_ssl_ca
+                conn_config["ssl_cert"] = self.config.db_ssl_cert
+                conn_config["ssl_key"] = self.config.db_ssl_key
+                conn_config["ssl_verify_cert"] = True
+
+            self._pool = pooling.MySQLConnectionPool(
+                pool_name="airly",
+                pool_size=2,
+                pool_reset_session=True,
+                **conn_config
+            )
+        return self._pool
+
     def fetch_from_airly(self) -> Optional[dict]:
         """Fetch raw data from Airly API."""
         if not self.config.airly_api_key:
@@ -163,11 +301,7 @@ class AirlyCollector:
             return None
         
         try:
-            response = requests.get(
-                self.config.airly_api_url,
-                headers={"apikey": self.config.airly_api_key},
-                timeout=30
-            )
+            response = self.session.get(self.config.airly_api_url, timeout=30)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
@@ -199,74 +333,41 @@ class AirlyCollector:
         indexes = source.get("indexes", [])
         if indexes:
             aqi = indexes[0].get("value")
-        
-        return Measurement(
-            timestamp=datetime.now(timezone.utc).replace(tzinfo=None),
-            city=self.config.city_name,
-            latitude=self.config.latitude,
-            longitude=self.config.longitude,
-            pm25=values.get("PM25"),
-            pm10=values.get("PM10"),
-            temperature=values.get("TEMPERATURE"),
-            humidity=values.get("HUMIDITY"),
-            pressure=values.get("PRESSURE"),
-            aqi=aqi,
-            station_id=self.config.installation_id
-        )
+
+        return Measurement.create(self.config, values, aqi)
     
     def save_to_database(self, measurement: Measurement) -> bool:
-        """Save measurement to MariaDB."""
-        # Build connection config
-        conn_config = {
-            "host": self.config.db_host,
-            "port": self.config.db_port,
-            "database": self.config.db_name,
-            "user": self.config.db_user,
-            "password": self.config.db_password,
-            "connect_timeout": 10
-        }
-        
-        # Add SSL configuration if certificates are available
-        if self.config.db_ssl_ca and self.config.db_ssl_cert and self.config.db_ssl_key:
-            conn_config["ssl_ca"] = self.config.db_ssl_ca
-            conn_config["ssl_cert"] = self.config.db_ssl_cert
-            conn_config["ssl_key"] = self.config.db_ssl_key
-            conn_config["ssl_verify_cert"] = True
-        
+        """Buffer measurement and flush to MariaDB when the batch is full."""
+        self._buffer.append(measurement)
+        if len(self._buffer) < self.config.batch_size:
+            logger.info(f"Buffered for DB: {len(self._buffer)}/{self.config.batch_size}")
+            return True
+        return self._flush_database()
+
+    def _flush_database(self) -> bool:
+        """Write all buffered measurements to MariaDB in one transaction."""
+        if not self._buffer:
+            return True
+
+        rows = [m.as_db_row() for m in self._buffer]
+
         try:
-            conn = mysql.connector.connect(**conn_config)
+            conn = self._get_pool().get_connection()
         except MySQLError as e:
             logger.error(f"Database connection failed: {e}")
             return False
-        
+
         cursor = None
         try:
+            # Plain cursor: its executemany collapses the batch into one
+            # multi-row INSERT, while a prepared cursor would PREPARE and
+            # then execute row by row on this fresh-per-flush cursor
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO measurements 
-                (datetime_utc, city, lat, lon, hour_utc, minute_utc, 
-                 pm25, pm10, temperature, humidity, pressure, aqi, station_id)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                measurement.timestamp,
-                measurement.city,
-                measurement.latitude,
-                measurement.longitude,
-                measurement.hour_utc,
-                measurement.minute_utc,
-                measurement.pm25,
-                measurement.pm10,
-                measurement.temperature,
-                measurement.humidity,
-                measurement.pressure,
-                measurement.aqi,
-                measurement.station_id
-            ))
+            cursor.executemany(self.INSERT_SQL, rows)
             conn.commit()
-            logger.info(
-                f"Saved to DB: {measurement.timestamp} - "
-                f"PM2.5: {measurement.pm25}, PM10: {measurement.pm10}, AQI: {measurement.aqi}"
-            )
+            logger.info(f"Saved {len(rows)} measurement(s) to DB, latest: {rows[-1][0]}")
+            # Keep rows buffered on failure so they are retried next flush
+            self._buffer.clear()
             return True
         except MySQLError as e:
             logger.error(f"Failed to save to database: {e}")
@@ -278,24 +379,42 @@ class AirlyCollector:
             conn.close()
     
     def save_to_csv(self, measurement: Measurement) -> bool:
-        """Append measurement to CSV file."""
-        csv_dir = os.path.dirname(self.config.csv_file)
-        if csv_dir:
-            os.makedirs(csv_dir, exist_ok=True)
-        
-        file_exists = os.path.exists(self.config.csv_file)
-        
+        """Append measurement to the CSV file as one atomic O_APPEND write."""
         try:
-            with open(self.config.csv_file, "a", newline="") as f:
-                writer = csv.writer(f)
-                if not file_exists:
-                    writer.writerow(self.CSV_HEADERS)
-                writer.writerow(measurement.to_csv_row())
+            if self._csv_fd is None:
+                csv_dir = os.path.dirname(self.config.csv_file)
+                if csv_dir:
+                    os.makedirs(csv_dir, exist_ok=True)
+
+                write_header = (
+                    not os.path.exists(self.config.csv_file)
+                    or os.path.getsize(self.config.csv_file) == 0
+                )
+                self._csv_fd = os.open(
+                    self.config.csv_file,
+                    os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+                    0o644
+                )
+                if write_header:
+                    os.write(self._csv_fd, (",".join(self.CSV_HEADERS) + "\n").encode())
+
+            os.write(self._csv_fd, measurement.to_csv_line())
             logger.info(f"Saved to CSV: {self.config.csv_file}")
             return True
-        except IOError as e:
+        except OSError as e:
             logger.error(f"Failed to save to CSV: {e}")
             return False
+
+    def flush(self) -> None:
+        """Flush buffered measurements and close the CSV descriptor.
+
+        Registered with atexit so nothing is lost on shutdown.
+        """
+        if self._buffer:
+            self._flush_database()
+        if self._csv_fd is not None:
+            os.close(self._csv_fd)
+            self._csv_fd = None
     
     def send_to_hsbi(self, measurement: Measurement) -> bool:
         """Forward measurement to HSBI Smart Data API."""
@@ -303,28 +422,22 @@ class AirlyCollector:
             logger.warning("HSBI API URL not configured")
             return False
         
-        payload = {
-            "id": self.config.hsbi_sensor_id,
-            "ts": measurement.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-            "pos": f"POINTZ({self.config.latitude} {self.config.longitude} {self.config.hsbi_altitude})",
-            "temp": measurement.temperature or 0,
-            "hum": measurement.humidity or 0,
-            "pres": measurement.pressure or 0,
-            "mass_pm2_5": measurement.pm25 or 0,
-            "mass_pm10": measurement.pm10 or 0,
-            "mass_pm1_0": (measurement.pm25 or 0) * 0.7,  # Approximation
-            "mass_pm4": measurement.pm10 or 0,
-            "number_pm0_5": 0,
-            "number_pm1_0": 0,
-            "number_pm2_5": 0,
-            "number_pm4": 0,
-            "number_pm10": 0
-        }
-        
+        payload = self._hsbi_template.copy()
+        payload.update(
+            ts=measurement.timestamp_str,
+            temp=measurement.temperature or 0,
+            hum=measurement.humidity or 0,
+            pres=measurement.pressure or 0,
+            mass_pm2_5=measurement.pm25 or 0,
+            mass_pm10=measurement.pm10 or 0,
+            mass_pm1_0=(measurement.pm25 or 0) * 0.7,  # Approximation
+            mass_pm4=measurement.pm10 or 0,
+        )
+
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.config.hsbi_api_url,
-                json=payload,
+                data=orjson.dumps(payload),
                 headers={"Content-Type": "application/json"},
                 timeout=30,
                 verify=self.config.hsbi_verify_ssl
@@ -348,36 +461,58 @@ class AirlyCollector:
         if not measurement:
             return False
         
-        success = True
-        
+        futures = {}
+
         if self.config.enable_database:
-            if not self.save_to_database(measurement):
-                success = False
-        
+            futures["database"] = self._executor.submit(self.save_to_database, measurement)
+
         if self.config.enable_csv:
-            if not self.save_to_csv(measurement):
-                success = False
-        
+            futures["csv"] = self._executor.submit(self.save_to_csv, measurement)
+
         if self.config.enable_hsbi:
-            self.send_to_hsbi(measurement)
-        
+            futures["hsbi"] = self._executor.submit(self.send_to_hsbi, measurement)
+
+        success = True
+        for name, future in futures.items():
+            # HSBI forwarding is best-effort and does not affect cycle success
+            if not future.result() and name != "hsbi":
+                success = False
+
         return success
     
     def run(self) -> None:
-        """Run continuous collection loop."""
+        """Run scheduled collection until interrupted."""
         self._log_config()
-        
-        while True:
-            try:
-                if self.collect_once():
-                    logger.info("Data collection successful")
-                else:
-                    logger.warning("Data collection failed, will retry next interval")
-            except Exception as e:
-                logger.error(f"Unexpected error: {e}")
-            
-            logger.info(f"Sleeping for {self.config.interval_seconds} seconds...")
-            time.sleep(self.config.interval_seconds)
+
+        # Hourly collection fires on :00 regardless of how long a cycle
+        # takes, so the schedule never drifts; other intervals keep a
+        # fixed period
+        if self.config.interval_seconds == 3600:
+            trigger = CronTrigger(minute=0)
+        else:
+            trigger = IntervalTrigger(seconds=self.config.interval_seconds)
+
+        scheduler = BackgroundScheduler()
+        scheduler.add_job(self._collect_safely, trigger, misfire_grace_time=60)
+        scheduler.start()
+
+        # Collect immediately instead of waiting for the first tick
+        self._collect_safely()
+
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            scheduler.shutdown()
+
+    def _collect_safely(self) -> None:
+        """Run one collection cycle, logging instead of raising."""
+        try:
+            if self.collect_once():
+                logger.info("Data collection successful")
+            else:
+                logger.warning("Data collection failed, will retry next interval")
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
     
     def _log_config(self) -> None:
         """Log current configuration."""
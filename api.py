@@ -5,30 +5,72 @@ REST API for adding and retrieving air quality measurements.
 """
 
 from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from cachetools import TTLCache
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, List
+import msgspec
 import mysql.connector
 from mysql.connector import Error as MySQLError
+from mysql.connector import pooling
 import os
+import time
 
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-
-# Rate limiter setup
-limiter = Limiter(key_func=get_remote_address)
+try:
+    import redis
+except ImportError:
+    redis = None
 
 app = FastAPI(
     title="Airly Data API",
     description="API for air quality data storage and retrieval",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# Add rate limiter to app
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# Rate limiting: one Redis INCR per request when REDIS_URL is set, so the
+# limit is shared across uvicorn workers; otherwise a per-process counter
+RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "100"))
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+_redis = redis.Redis.from_url(REDIS_URL) if (redis and REDIS_URL) else None
+_local_hits = {}  # (ip, minute window) -> request count
+
+
+def _rate_limited(ip: str) -> bool:
+    """Count a request against the per-IP fixed minute window."""
+    window = int(time.time() // 60)
+
+    if _redis is not None:
+        try:
+            key = f"ratelimit:{ip}:{window}"
+            count = _redis.incr(key)
+            if count == 1:
+                _redis.expire(key, 120)
+            return count > RATE_LIMIT_PER_MINUTE
+        except redis.RedisError:
+            return False  # Fail open if Redis is unreachable
+
+    key = (ip, window)
+    count = _local_hits.get(key, 0) + 1
+    _local_hits[key] = count
+    if len(_local_hits) > 4096:
+        for stale in [k for k in _local_hits if k[1] < window]:
+            del _local_hits[stale]
+    return count > RATE_LIMIT_PER_MINUTE
+
+
+@app.middleware("http")
+async def rate_limit(request: Request, call_next):
+    if request.url.path != "/health":
+        ip = request.client.host if request.client else "unknown"
+        if _rate_limited(ip):
+            return ORJSONResponse(
+                {"detail": f"Rate limit exceeded: {RATE_LIMIT_PER_MINUTE} per minute"},
+                status_code=429
+            )
+    return await call_next(request)
 
 # Database configuration
 DB_CONFIG = {
@@ -37,6 +79,9 @@ DB_CONFIG = {
     "database": os.getenv("DB_NAME", "airly"),
     "user": os.getenv("DB_USER", "airly"),
     "password": os.getenv("DB_PASSWORD", "airly_pass"),
+    # Prefer the connector's libmysqlclient-backed C extension when built in;
+    # it roughly halves per-query CPU versus the pure-Python protocol code
+    "use_pure": not mysql.connector.HAVE_CEXT,
 }
 
 # Add SSL configuration if certificates are available
@@ -52,6 +97,22 @@ if ssl_ca and ssl_cert and ssl_key:
 
 API_KEY = os.getenv("API_KEY", "")
 
+# Connection pool (created lazily so the API can start before the database)
+_pool = None
+
+
+def get_pool():
+    """Get (lazily creating) the shared connection pool."""
+    global _pool
+    if _pool is None:
+        _pool = pooling.MySQLConnectionPool(
+            pool_name="airly",
+            pool_size=8,
+            pool_reset_session=True,
+            **DB_CONFIG
+        )
+    return _pool
+
 
 # Data models
 class MeasurementInput(BaseModel):
@@ -88,15 +149,94 @@ class MeasurementOutput(BaseModel):
 
 # Dependencies
 def get_db():
-    """Create database connection."""
+    """Get a pooled database connection."""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        yield conn
+        conn = get_pool().get_connection()
     except MySQLError as e:
         raise HTTPException(status_code=500, detail=f"Database connection failed: {e}")
+    try:
+        yield conn
     finally:
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
+        conn.close()  # Returns the connection to the pool
+
+
+# Read caches: stats is a full-table scan that changes roughly hourly, so a
+# 60 s TTL is safe; the row reads get a shorter TTL and only small results
+# are cached. Both are cleared whenever a write goes through.
+_stats_cache = TTLCache(maxsize=1, ttl=60)
+_read_cache = TTLCache(maxsize=256, ttl=10)
+CACHE_LIMIT_MAX = 100
+
+
+def _invalidate_caches():
+    """Drop cached reads after a successful write."""
+    _stats_cache.clear()
+    _read_cache.clear()
+
+
+# The CASTs keep the numeric columns coming back as floats even against
+# databases created before the schema moved from DECIMAL to FLOAT/DOUBLE.
+# Datetimes are fetched natively and stringified client-side: the
+# connector substitutes every literal %s in the statement, so SQL like
+# DATE_FORMAT patterns cannot be sent through parameterized queries.
+SELECT_COLUMNS = (
+    "id, datetime_utc, "
+    "city, CAST(lat AS DOUBLE) AS lat, CAST(lon AS DOUBLE) AS lon, "
+    "hour_utc, minute_utc, CAST(pm25 AS DOUBLE) AS pm25, "
+    "CAST(pm10 AS DOUBLE) AS pm10, CAST(temperature AS DOUBLE) AS temperature, "
+    "CAST(humidity AS DOUBLE) AS humidity, CAST(pressure AS DOUBLE) AS pressure, "
+    "CAST(aqi AS DOUBLE) AS aqi, station_id, created_at"
+)
+
+
+class MeasurementRow(msgspec.Struct):
+    """One measurements row in SELECT_COLUMNS order.
+
+    Built positionally from tuple-cursor rows — no per-row dict with
+    hashed string keys — and encoded to JSON by msgspec in C.
+    """
+
+    id: int
+    datetime_utc: str
+    city: str
+    lat: float
+    lon: float
+    hour_utc: int
+    minute_utc: int
+    pm25: Optional[float]
+    pm10: Optional[float]
+    temperature: Optional[float]
+    humidity: Optional[float]
+    pressure: Optional[float]
+    aqi: Optional[float]
+    station_id: Optional[int]
+    created_at: str
+
+
+_row_encoder = msgspec.json.Encoder()
+
+
+def _as_row(row):
+    """Build a MeasurementRow, stringifying the two datetime columns."""
+    return MeasurementRow(
+        row[0], row[1].isoformat(), *row[2:14], row[14].isoformat()
+    )
+
+
+def _stream_rows(cursor):
+    """Yield a JSON array row by row from an unbuffered tuple cursor."""
+    try:
+        yield b"["
+        first = True
+        for row in cursor:
+            if first:
+                first = False
+            else:
+                yield b","
+            yield _row_encoder.encode(_as_row(row))
+        yield b"]"
+    finally:
+        cursor.close()
 
 
 def verify_api_key(x_api_key: str = Header(..., alias="X-API-Key")):
@@ -112,13 +252,11 @@ def verify_api_key(x_api_key: str = Header(..., alias="X-API-Key")):
 @app.get("/health")
 def health_check():
     """Health check endpoint (no auth required)."""
-    return {"status": "ok", "timestamp": datetime.utcnow().isoformat()}
+    return {"status": "ok", "timestamp": datetime.now(timezone.utc).isoformat()}
 
 
-@app.get("/measurements", response_model=List[dict])
-@limiter.limit("100/minute")
+@app.get("/measurements")
 def get_measurements(
-    request: Request,
     limit: int = Query(default=10, le=1000),
     city: Optional[str] = None,
     station_id: Optional[int] = None,
@@ -126,49 +264,63 @@ def get_measurements(
     api_key: str = Depends(verify_api_key)
 ):
     """Get recent measurements."""
-    cursor = conn.cursor(dictionary=True)
-    
-    query = "SELECT * FROM measurements WHERE 1=1"
+    # Small results are cached as serialized bytes for a few seconds.
+    # The "list" prefix keeps these keys disjoint from /latest entries
+    # in the shared cache (a city named "latest" must not collide).
+    cache_key = ("list", city, station_id, limit) if limit <= CACHE_LIMIT_MAX else None
+    if cache_key is not None:
+        cached = _read_cache.get(cache_key)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
+    # Unbuffered tuple cursor + streaming response: rows are mapped into
+    # structs and serialized one at a time instead of materializing the
+    # whole result set twice
+    cursor = conn.cursor(buffered=False)
+
+    # When both filters are set the planner picks idx_city_station_dt and
+    # walks it in ORDER BY order, stopping at LIMIT instead of filesorting.
+    # No index hint: it would error on databases predating the index.
+    query = f"SELECT {SELECT_COLUMNS} FROM measurements WHERE 1=1"
     params = []
-    
+
     if city:
         query += " AND city = %s"
         params.append(city)
-    
+
     if station_id:
         query += " AND station_id = %s"
         params.append(station_id)
-    
+
     query += " ORDER BY datetime_utc DESC LIMIT %s"
     params.append(limit)
-    
+
     cursor.execute(query, params)
-    results = cursor.fetchall()
-    cursor.close()
-    
-    # Convert datetime objects to strings for JSON serialization
-    for row in results:
-        if row.get('datetime_utc'):
-            row['datetime_utc'] = row['datetime_utc'].isoformat()
-        if row.get('created_at'):
-            row['created_at'] = row['created_at'].isoformat()
-    
-    return results
+
+    if cache_key is not None:
+        body = b"".join(_stream_rows(cursor))
+        _read_cache[cache_key] = body
+        return Response(content=body, media_type="application/json")
+
+    return StreamingResponse(_stream_rows(cursor), media_type="application/json")
 
 
 @app.get("/measurements/latest")
-@limiter.limit("100/minute")
 def get_latest_measurement(
-    request: Request,
     city: Optional[str] = None,
     station_id: Optional[int] = None,
     conn=Depends(get_db),
     api_key: str = Depends(verify_api_key)
 ):
     """Get the most recent measurement."""
-    cursor = conn.cursor(dictionary=True)
-    
-    query = "SELECT * FROM measurements WHERE 1=1"
+    cache_key = ("latest", city, station_id)
+    cached = _read_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    cursor = conn.cursor()
+
+    query = f"SELECT {SELECT_COLUMNS} FROM measurements WHERE 1=1"
     params = []
     
     if city:
@@ -187,23 +339,22 @@ def get_latest_measurement(
     
     if not result:
         raise HTTPException(status_code=404, detail="No measurements found")
-    
-    if result.get('datetime_utc'):
-        result['datetime_utc'] = result['datetime_utc'].isoformat()
-    if result.get('created_at'):
-        result['created_at'] = result['created_at'].isoformat()
-    
-    return result
+
+    body = _row_encoder.encode(_as_row(result))
+    _read_cache[cache_key] = body
+    return Response(content=body, media_type="application/json")
 
 
 @app.get("/measurements/stats")
-@limiter.limit("100/minute")
 def get_stats(
-    request: Request,
     conn=Depends(get_db),
     api_key: str = Depends(verify_api_key)
 ):
     """Get database statistics."""
+    cached = _stats_cache.get("stats")
+    if cached is not None:
+        return cached
+
     cursor = conn.cursor(dictionary=True)
     
     cursor.execute("""
@@ -220,28 +371,25 @@ def get_stats(
     """)
     result = cursor.fetchone()
     cursor.close()
-    
-    if result.get('first_record'):
-        result['first_record'] = result['first_record'].isoformat()
-    if result.get('last_record'):
-        result['last_record'] = result['last_record'].isoformat()
-    
+
+    _stats_cache["stats"] = result
     return result
 
 
 @app.post("/measurements")
-@limiter.limit("100/minute")
 def add_measurement(
-    request: Request,
     data: MeasurementInput,
     conn=Depends(get_db),
     api_key: str = Depends(verify_api_key)
 ):
     """Add a new measurement (requires API key)."""
+    # Plain cursor: a prepared one would cost a PREPARE round trip per
+    # request with no reuse, since pool_reset_session deallocates
+    # statements whenever the connection goes back to the pool
     cursor = conn.cursor()
     
-    # Use provided datetime or current UTC time
-    dt = data.datetime_utc or datetime.utcnow()
+    # Use provided datetime or current UTC time (naive, matching the column)
+    dt = data.datetime_utc or datetime.now(timezone.utc).replace(tzinfo=None)
     
     try:
         cursor.execute("""
@@ -268,7 +416,8 @@ def add_measurement(
         conn.commit()
         row_id = cursor.lastrowid
         cursor.close()
-        
+        _invalidate_caches()
+
         return {
             "status": "ok",
             "id": row_id,
@@ -281,9 +430,7 @@ def add_measurement(
 
 
 @app.delete("/measurements/{measurement_id}")
-@limiter.limit("100/minute")
 def delete_measurement(
-    request: Request,
     measurement_id: int,
     conn=Depends(get_db),
     api_key: str = Depends(verify_api_key)
@@ -298,4 +445,5 @@ def delete_measurement(
         raise HTTPException(status_code=404, detail="Measurement not found")
     
     cursor.close()
+    _invalidate_caches()
     return {"status": "ok", "deleted_id": measurement_id}
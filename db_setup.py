@@ -5,15 +5,24 @@ Handles database initialization, schema creation, and data migration.
 Can be run independently from the collector.
 """
 
+import contextlib
 import csv
+import multiprocessing
 import os
+import queue
 import sys
+import threading
 import logging
 from datetime import datetime
 from dotenv import load_dotenv
 import mysql.connector
 from mysql.connector import Error as MySQLError
 
+try:
+    import pandas as pd
+except ImportError:
+    pd = None  # Migration falls back to the pure-Python csv path
+
 # Load environment variables
 load_dotenv()
 
@@ -33,6 +42,37 @@ DB_SSL_KEY = os.getenv("DB_SSL_KEY")
 CSV_FILE = os.getenv("CSV_FILE", "./data/airly_gdansk.csv")
 DEFAULT_STATION_ID = int(os.getenv("INSTALLATION_ID", "3387"))
 
+# Rows per INSERT batch during migration: one executemany round-trip and one
+# commit per batch instead of one of each per row. At ~130 bytes per row a
+# batch stays well under the server's default 16 MB max_allowed_packet.
+BATCH_ROWS = 1000
+
+# Rows per pandas chunk: keeps memory flat on large CSVs while preserving
+# the vectorized parse
+CHUNK_ROWS = 50_000
+
+# CSV columns in INSERT parameter order, and their parsed dtypes (nullable
+# pandas dtypes so empty cells become NA instead of raising)
+CSV_COLUMNS = [
+    'datetime_utc', 'city', 'lat', 'lon', 'hour_utc', 'minute_utc',
+    'PM25', 'PM10', 'TEMPERATURE', 'HUMIDITY', 'PRESSURE', 'AQI', 'station_id'
+]
+
+CSV_DTYPES = {
+    'city': 'string',
+    'lat': 'float64',
+    'lon': 'float64',
+    'hour_utc': 'Int8',
+    'minute_utc': 'Int8',
+    'PM25': 'float64',
+    'PM10': 'float64',
+    'TEMPERATURE': 'float64',
+    'HUMIDITY': 'float64',
+    'PRESSURE': 'float64',
+    'AQI': 'float64',
+    'station_id': 'Int64',
+}
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -46,27 +86,40 @@ CREATE TABLE IF NOT EXISTS measurements (
     id INT AUTO_INCREMENT PRIMARY KEY,
     datetime_utc DATETIME NOT NULL,
     city VARCHAR(100) NOT NULL,
-    lat DECIMAL(10, 6) NOT NULL,
-    lon DECIMAL(10, 6) NOT NULL,
+    lat DOUBLE NOT NULL,
+    lon DOUBLE NOT NULL,
     hour_utc TINYINT NOT NULL,
     minute_utc TINYINT NOT NULL,
-    pm25 DECIMAL(10, 2),
-    pm10 DECIMAL(10, 2),
-    temperature DECIMAL(6, 2),
-    humidity DECIMAL(6, 2),
-    pressure DECIMAL(8, 2),
-    aqi DECIMAL(6, 2),
+    pm25 FLOAT,
+    pm10 FLOAT,
+    temperature FLOAT,
+    humidity FLOAT,
+    pressure FLOAT,
+    aqi FLOAT,
     station_id INT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_meas (datetime_utc, city, station_id),
     INDEX idx_datetime (datetime_utc),
     INDEX idx_city (city),
     INDEX idx_aqi (aqi),
-    INDEX idx_station (station_id)
+    INDEX idx_station (station_id),
+    INDEX idx_city_station_dt (city, station_id, datetime_utc DESC)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 """
 
+# Non-unique secondary indexes from SCHEMA_SQL. The migration drops these
+# before a bulk load (InnoDB has no working DISABLE KEYS) and rebuilds
+# each in one sorted pass afterwards.
+SECONDARY_INDEXES = [
+    ('idx_datetime', '(datetime_utc)'),
+    ('idx_city', '(city)'),
+    ('idx_aqi', '(aqi)'),
+    ('idx_station', '(station_id)'),
+    ('idx_city_station_dt', '(city, station_id, datetime_utc DESC)'),
+]
+
 
-def get_db_connection(database=None):
+def get_db_connection(database=None, local_infile=False):
     """Create and return a database connection."""
     try:
         config = {
@@ -74,10 +127,16 @@ def get_db_connection(database=None):
             "port": DB_PORT,
             "user": DB_USER,
             "password": DB_PASSWORD,
-            "connect_timeout": 10
+            "connect_timeout": 10,
+            "autocommit": False,
+            # Prefer the connector's C extension; it roughly halves
+            # per-row CPU versus the pure-Python protocol code
+            "use_pure": not mysql.connector.HAVE_CEXT
         }
         if database:
             config["database"] = database
+        if local_infile:
+            config["allow_local_infile"] = True
         
         # Add SSL configuration if certificates are available
         if DB_SSL_CA and DB_SSL_CERT and DB_SSL_KEY:
@@ -93,26 +152,50 @@ def get_db_connection(database=None):
         return None
 
 
-def check_connection():
-    """Check if database is accessible."""
+@contextlib.contextmanager
+def db(database=DB_NAME):
+    """Context manager yielding a connection (or None) that is closed on exit.
+
+    Lets multi-step commands share one connection instead of paying a
+    TCP + auth handshake per helper call.
+    """
+    connection = get_db_connection(database)
+    try:
+        yield connection
+    finally:
+        if connection:
+            connection.close()
+
+
+def check_connection(connection=None):
+    """Check if database is accessible.
+
+    A connection passed in is reused (and left open); otherwise one is
+    opened and closed here. The same applies to every setup helper below.
+    """
     logger.info(f"Checking connection to {DB_HOST}:{DB_PORT}...")
-    connection = get_db_connection(DB_NAME)
+    own = connection is None
+    if own:
+        connection = get_db_connection(DB_NAME)
     if connection:
         logger.info("✓ Database connection successful")
-        connection.close()
+        if own:
+            connection.close()
         return True
     else:
         logger.error("✗ Database connection failed")
         return False
 
 
-def create_database():
+def create_database(connection=None):
     """Create the database if it doesn't exist."""
     logger.info(f"Creating database '{DB_NAME}' if not exists...")
-    connection = get_db_connection()  # Connect without database
+    own = connection is None
+    if own:
+        connection = get_db_connection()  # Connect without database
     if not connection:
         return False
-    
+
     try:
         cursor = connection.cursor()
         cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_NAME}")
@@ -120,58 +203,76 @@ def create_database():
         connection.commit()
         logger.info(f"✓ Database '{DB_NAME}' ready")
         cursor.close()
-        connection.close()
+        if own:
+            connection.close()
         return True
     except MySQLError as e:
         logger.error(f"Failed to create database: {e}")
         return False
 
 
-def create_schema():
+def create_schema(connection=None):
     """Create the measurements table schema."""
     logger.info("Creating schema...")
-    connection = get_db_connection(DB_NAME)
+    own = connection is None
+    if own:
+        connection = get_db_connection(DB_NAME)
     if not connection:
         return False
-    
+
     try:
         cursor = connection.cursor()
         cursor.execute(SCHEMA_SQL)
+        # CREATE TABLE IF NOT EXISTS leaves pre-existing tables untouched,
+        # so bring their indexes up to date too; IF NOT EXISTS makes this
+        # a no-op once applied
+        cursor.execute(
+            "ALTER TABLE measurements ADD INDEX IF NOT EXISTS "
+            "idx_city_station_dt (city, station_id, datetime_utc DESC)"
+        )
+        cursor.execute(
+            "ALTER TABLE measurements ADD UNIQUE KEY IF NOT EXISTS "
+            "uq_meas (datetime_utc, city, station_id)"
+        )
         connection.commit()
         logger.info("✓ Schema created successfully")
         cursor.close()
-        connection.close()
+        if own:
+            connection.close()
         return True
     except MySQLError as e:
         logger.error(f"Failed to create schema: {e}")
         return False
 
 
-def get_table_info():
+def get_table_info(connection=None):
     """Get information about the measurements table."""
-    connection = get_db_connection(DB_NAME)
+    own = connection is None
+    if own:
+        connection = get_db_connection(DB_NAME)
     if not connection:
         return None
-    
+
     try:
         cursor = connection.cursor(dictionary=True)
-        
+
         # Get row count
         cursor.execute("SELECT COUNT(*) as count FROM measurements")
         count = cursor.fetchone()['count']
-        
+
         # Get date range
         cursor.execute("""
-            SELECT 
+            SELECT
                 MIN(datetime_utc) as first_record,
                 MAX(datetime_utc) as last_record
             FROM measurements
         """)
         dates = cursor.fetchone()
-        
+
         cursor.close()
-        connection.close()
-        
+        if own:
+            connection.close()
+
         return {
             "row_count": count,
             "first_record": dates['first_record'],
@@ -182,13 +283,290 @@ def get_table_info():
         return None
 
 
-def migrate_csv(csv_file=None, skip_duplicates=True):
+# INSERT IGNORE: the uq_meas unique key deduplicates in-engine, so no
+# per-row existence SELECT is needed
+INSERT_QUERY = """
+    INSERT IGNORE INTO measurements
+    (datetime_utc, city, lat, lon, hour_utc, minute_utc, pm25, pm10, temperature, humidity, pressure, aqi, station_id)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def _native(value):
+    """Convert pandas/numpy scalars to plain Python values for binding."""
+    if value is None:
+        return None
+    if hasattr(value, "to_pydatetime"):
+        return value.to_pydatetime()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def _existing_keys(cursor):
+    """Fetch the unique-key tuples already in the table.
+
+    One round-trip up front lets the loaders drop duplicate rows
+    client-side instead of shipping them for the server to reject.
+    """
+    cursor.execute("SELECT datetime_utc, city, station_id FROM measurements")
+    return set(cursor.fetchall())
+
+
+def _chunk_to_rows(df):
+    """Validate one parsed DataFrame chunk and turn it into INSERT tuples.
+
+    Validation is column-wise: unparseable datetimes coerce to NaT and
+    rows missing the NOT NULL key fields are dropped with a logged
+    sample, replacing the old per-row try/except. Returns (rows, n_bad).
+    """
+    df['datetime_utc'] = pd.to_datetime(df['datetime_utc'], errors='coerce')
+    bad = df['datetime_utc'].isna() | df['city'].isna()
+    n_bad = int(bad.sum())
+    if n_bad:
+        sample = df.loc[bad].head(3).to_dict('records')
+        logger.warning(f"Dropping {n_bad} invalid row(s), e.g.: {sample}")
+        df = df.loc[~bad].copy()
+
+    if 'station_id' not in df.columns:
+        df['station_id'] = DEFAULT_STATION_ID
+    df['station_id'] = df['station_id'].fillna(DEFAULT_STATION_ID)
+    df = df[CSV_COLUMNS]
+
+    # NA -> None and numpy scalars -> Python natives for parameter binding
+    mask = df.notna()
+    df = df.astype(object).where(mask, None)
+    rows = [
+        tuple(_native(v) for v in row)
+        for row in df.itertuples(index=False, name=None)
+    ]
+    return rows, n_bad
+
+
+def _load_rows_pandas(cursor, connection, csv_file, existing=None):
+    """Parse the CSV with pandas' vectorized C engine and insert in batches.
+
+    The file is streamed CHUNK_ROWS rows at a time so memory stays flat
+    however large the CSV is. Parsing and inserting are pipelined: the
+    calling thread parses chunks and feeds batches through a bounded
+    queue to a single writer thread that owns the cursor and runs
+    executemany + commit, so redo-log flush latency overlaps with
+    parsing the next chunk. One writer keeps InnoDB lock contention on
+    uq_meas out of the picture. Returns (rows_attempted, rows_imported,
+    rows_skipped, rows_prefiltered).
+    """
+    rows_skipped = 0
+    rows_prefiltered = 0
+    batches = queue.Queue(maxsize=4)  # bounded for backpressure
+    written = [0, 0]  # [attempted, imported]
+    failure = []
+
+    def writer():
+        try:
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    return
+                cursor.executemany(INSERT_QUERY, batch)
+                connection.commit()
+                written[0] += len(batch)
+                # INSERT IGNORE reports only the rows actually inserted,
+                # so rowcount gives the duplicate tally for free
+                written[1] += cursor.rowcount
+        except Exception as e:
+            failure.append(e)
+            # Drain so the producer's put() never blocks forever
+            while batches.get() is not None:
+                pass
+
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    writer_thread.start()
+
+    reader = pd.read_csv(
+        csv_file,
+        dtype=CSV_DTYPES,
+        parse_dates=['datetime_utc'],
+        na_values=[''],
+        chunksize=CHUNK_ROWS
+    )
+
+    try:
+        for chunk in reader:
+            rows, n_bad = _chunk_to_rows(chunk)
+            rows_skipped += n_bad
+
+            if existing is not None:
+                kept = [r for r in rows if (r[0], r[1], r[12]) not in existing]
+                rows_prefiltered += len(rows) - len(kept)
+                rows = kept
+
+            for start in range(0, len(rows), BATCH_ROWS):
+                if failure:
+                    break
+                batches.put(rows[start:start + BATCH_ROWS])
+    finally:
+        batches.put(None)
+        writer_thread.join()
+
+    if failure:
+        raise failure[0]
+    return written[0], written[1], rows_skipped, rows_prefiltered
+
+
+def _worker_load(task):
+    """Load one CSV shard in a worker process with its own connection."""
+    csv_file, start, nrows = task
+    connection = get_db_connection(DB_NAME)
+    if not connection:
+        # Propagates through pool.map so migrate_csv reports failure
+        # instead of finishing "complete" with a silently empty shard
+        raise RuntimeError(
+            f"Worker could not connect to load rows {start}-{start + nrows}"
+        )
+
+    # Plain cursor: keeps executemany's multi-row INSERT rewrite (the
+    # prepared cursors execute row by row instead)
+    cursor = connection.cursor()
+    df = pd.read_csv(
+        csv_file,
+        dtype=CSV_DTYPES,
+        parse_dates=['datetime_utc'],
+        na_values=[''],
+        header=0,
+        skiprows=range(1, start + 1),
+        nrows=nrows
+    )
+    rows, n_bad = _chunk_to_rows(df)
+
+    rows_attempted = 0
+    rows_imported = 0
+    for s in range(0, len(rows), BATCH_ROWS):
+        batch = rows[s:s + BATCH_ROWS]
+        cursor.executemany(INSERT_QUERY, batch)
+        connection.commit()
+        rows_attempted += len(batch)
+        rows_imported += cursor.rowcount
+
+    cursor.close()
+    connection.close()
+    return rows_attempted, rows_imported, n_bad
+
+
+def _load_rows_parallel(csv_file, workers):
+    """Shard the CSV across worker processes for concurrent ingest.
+
+    Each worker parses its own byte range and inserts over its own
+    connection, so parse CPU and InnoDB writes scale with worker count.
+    The client-side duplicate prefilter is skipped here — the uq_meas
+    unique key still guards every insert. Returns (rows_attempted,
+    rows_imported, rows_skipped, rows_prefiltered).
+    """
+    with open(csv_file, 'r', newline='') as f:
+        total = sum(1 for _ in f) - 1
+    if total <= 0:
+        return 0, 0, 0, 0
+
+    shard = -(-total // workers)  # ceil division
+    tasks = [(csv_file, start, shard) for start in range(0, total, shard)]
+
+    with multiprocessing.Pool(processes=len(tasks)) as pool:
+        results = pool.map(_worker_load, tasks)
+
+    rows_attempted = sum(r[0] for r in results)
+    rows_imported = sum(r[1] for r in results)
+    rows_skipped = sum(r[2] for r in results)
+    return rows_attempted, rows_imported, rows_skipped, 0
+
+
+def _load_rows_python(cursor, connection, csv_file, existing=None):
+    """Fallback parser using the csv module when pandas is unavailable.
+
+    Returns (rows_attempted, rows_imported, rows_skipped, rows_prefiltered).
+    """
+    rows_attempted = 0
+    rows_imported = 0
+    rows_skipped = 0
+    rows_prefiltered = 0
+    batch = []
+
+    def flush_batch():
+        """Insert the buffered rows in one round-trip and commit."""
+        nonlocal rows_attempted, rows_imported
+        if not batch:
+            return
+        cursor.executemany(INSERT_QUERY, batch)
+        connection.commit()
+        rows_attempted += len(batch)
+        rows_imported += cursor.rowcount
+        batch.clear()
+
+    with open(csv_file, 'r', newline='') as f:
+        # Plain csv.reader + positional indices resolved once from the
+        # header: avoids DictReader's per-row dict allocation and key
+        # lookups, which dominate the pure-Python loop on wide rows.
+        reader = csv.reader(f)
+        header = next(reader)
+        idx = {name: i for i, name in enumerate(header)}
+        i_dt = idx['datetime_utc']
+        i_city = idx['city']
+        i_station = idx.get('station_id')  # absent in pre-station CSVs
+
+        # Precompiled (index, converter) table for the nullable numeric
+        # columns: one tight comprehension per row instead of 11 inline
+        # ternaries re-evaluated as bytecode each time
+        converters = [
+            (idx['lat'], float), (idx['lon'], float),
+            (idx['hour_utc'], int), (idx['minute_utc'], int),
+            (idx['PM25'], float), (idx['PM10'], float),
+            (idx['TEMPERATURE'], float), (idx['HUMIDITY'], float),
+            (idx['PRESSURE'], float), (idx['AQI'], float),
+        ]
+
+        for row in reader:
+            try:
+                # Parse datetime; fromisoformat is ~5-10x faster than
+                # strptime and accepts the space separator on 3.11+
+                dt = datetime.fromisoformat(row[i_dt])
+                city = row[i_city]
+                station = row[i_station] if i_station is not None else ''
+
+                # Prepare values, handling empty strings
+                values = (dt, city) + tuple(
+                    conv(row[i]) if row[i] else None for i, conv in converters
+                ) + (int(station) if station else DEFAULT_STATION_ID,)
+
+                if existing is not None and (values[0], values[1], values[12]) in existing:
+                    rows_prefiltered += 1
+                    continue
+
+                batch.append(values)
+                if len(batch) >= BATCH_ROWS:
+                    flush_batch()
+
+            except Exception as e:
+                logger.warning(f"Skipping row: {e}")
+                rows_skipped += 1
+
+    flush_batch()
+    return rows_attempted, rows_imported, rows_skipped, rows_prefiltered
+
+
+def migrate_csv(csv_file=None, skip_duplicates=True, workers=1,
+                unsafe_fast=False):
     """
     Migrate CSV data to MariaDB.
-    
+
     Args:
         csv_file: Path to CSV file (defaults to CSV_FILE)
-        skip_duplicates: If True, skip rows that might be duplicates based on datetime
+        skip_duplicates: If True, report how many rows the unique key
+            rejected as duplicates (dedup itself is enforced in-engine)
+        workers: Number of parallel loader processes (requires pandas)
+        unsafe_fast: Relax redo-log flushing to once per second for the
+            duration of the run; a server crash mid-run can lose the
+            last ~1s of inserts, acceptable for a rerunnable one-shot
+            migration. The variable is GLOBAL-only, so this affects the
+            whole server, needs the SUPER privilege, and is restored to
+            its prior value afterwards
     """
     csv_file = csv_file or CSV_FILE
     
@@ -197,74 +575,112 @@ def migrate_csv(csv_file=None, skip_duplicates=True):
         return False
     
     logger.info(f"Migrating data from {csv_file}...")
-    
+
+    if not mysql.connector.HAVE_CEXT:
+        # The pure-Python protocol implementation costs 2-3x more CPU per
+        # row than the C extension; worth flagging before a long ingest
+        logger.warning(
+            "mysql-connector-python C extension not available; "
+            "migration will run on the slower pure-Python driver"
+        )
+
     connection = get_db_connection(DB_NAME)
     if not connection:
         return False
     
+    # Plain cursor on purpose: only the plain cursor classes rewrite
+    # executemany into a single multi-row INSERT ... VALUES (...),(...);
+    # the prepared-statement cursors fall back to one execute() round
+    # trip per row, which is exactly what batching is meant to avoid
     cursor = connection.cursor()
-    
-    insert_query = """
-        INSERT INTO measurements 
-        (datetime_utc, city, lat, lon, hour_utc, minute_utc, pm25, pm10, temperature, humidity, pressure, aqi, station_id)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
-    
-    check_query = "SELECT id FROM measurements WHERE datetime_utc = %s AND city = %s LIMIT 1"
-    
-    rows_imported = 0
-    rows_skipped = 0
-    rows_duplicate = 0
-    
+
+    # Separate cursor for session/DDL statements
+    admin = connection.cursor()
+
     try:
-        with open(csv_file, 'r', newline='') as f:
-            reader = csv.DictReader(f)
-            
-            for row in reader:
-                try:
-                    # Parse datetime
-                    dt = datetime.strptime(row['datetime_utc'], '%Y-%m-%d %H:%M:%S')
-                    city = row['city']
-                    
-                    # Check for duplicates if enabled
-                    if skip_duplicates:
-                        cursor.execute(check_query, (dt, city))
-                        if cursor.fetchone():
-                            rows_duplicate += 1
-                            continue
-                    
-                    # Prepare values, handling empty strings
-                    values = (
-                        dt,
-                        city,
-                        float(row['lat']) if row['lat'] else None,
-                        float(row['lon']) if row['lon'] else None,
-                        int(row['hour_utc']) if row['hour_utc'] else None,
-                        int(row['minute_utc']) if row['minute_utc'] else None,
-                        float(row['PM25']) if row['PM25'] else None,
-                        float(row['PM10']) if row['PM10'] else None,
-                        float(row['TEMPERATURE']) if row['TEMPERATURE'] else None,
-                        float(row['HUMIDITY']) if row['HUMIDITY'] else None,
-                        float(row['PRESSURE']) if row['PRESSURE'] else None,
-                        float(row['AQI']) if row['AQI'] else None,
-                        int(row.get('station_id', DEFAULT_STATION_ID)) if row.get('station_id') else DEFAULT_STATION_ID
-                    )
-                    
-                    cursor.execute(insert_query, values)
-                    rows_imported += 1
-                    
-                except Exception as e:
-                    logger.warning(f"Skipping row: {e}")
-                    rows_skipped += 1
-        
-        connection.commit()
+        # In-engine dedup hinges on uq_meas; tables created before the key
+        # existed won't have it, so ensure it before loading anything.
+        # Fails loudly if the table already holds duplicate rows.
+        admin.execute(
+            "ALTER TABLE measurements ADD UNIQUE KEY IF NOT EXISTS "
+            "uq_meas (datetime_utc, city, station_id)"
+        )
+
+        existing = _existing_keys(cursor) if skip_duplicates else None
+
+        # Bulk-load mode: drop the non-unique secondary indexes so inserts
+        # maintain only the primary and unique keys (ALTER ... DISABLE KEYS
+        # is a MyISAM feature and a no-op on InnoDB), and skip FK checks;
+        # unique_checks is relaxed only when duplicates aren't being
+        # screened, since the uq_meas key is what makes INSERT IGNORE
+        # deduplicate
+        for index_name, _ in SECONDARY_INDEXES:
+            admin.execute(
+                f"DROP INDEX IF EXISTS {index_name} ON measurements"
+            )
+        admin.execute("SET SESSION foreign_key_checks = 0")
+        relaxed_unique = not skip_duplicates
+        if relaxed_unique:
+            admin.execute("SET SESSION unique_checks = 0")
+        flush_log_prior = None
+        if unsafe_fast:
+            # Flush the redo log once per second instead of per commit.
+            # GLOBAL-only variable (no session scope in stock InnoDB), so
+            # read the current value first and restore it afterwards
+            try:
+                admin.execute(
+                    "SELECT @@GLOBAL.innodb_flush_log_at_trx_commit"
+                )
+                prior = admin.fetchone()[0]
+                admin.execute("SET GLOBAL innodb_flush_log_at_trx_commit = 2")
+                flush_log_prior = prior
+                logger.warning(
+                    "unsafe-fast: redo log flushed once per second "
+                    "server-wide; a crash mid-migration can lose the "
+                    "last second of rows"
+                )
+            except MySQLError as e:
+                # Typically a privilege error: SET GLOBAL needs SUPER
+                logger.warning(
+                    f"unsafe-fast unavailable, continuing with default "
+                    f"flushing: {e}"
+                )
+
+        try:
+            if workers > 1 and pd is not None:
+                counts = _load_rows_parallel(csv_file, workers)
+            else:
+                loader = _load_rows_pandas if pd is not None else _load_rows_python
+                counts = loader(cursor, connection, csv_file, existing)
+            rows_attempted, rows_imported, rows_skipped, rows_prefiltered = counts
+        finally:
+            if flush_log_prior is not None:
+                admin.execute(
+                    "SET GLOBAL innodb_flush_log_at_trx_commit = "
+                    f"{int(flush_log_prior)}"
+                )
+            if relaxed_unique:
+                admin.execute("SET SESSION unique_checks = 1")
+            admin.execute("SET SESSION foreign_key_checks = 1")
+            # Rebuild the dropped indexes even if the load failed partway
+            for index_name, index_cols in SECONDARY_INDEXES:
+                admin.execute(
+                    f"ALTER TABLE measurements ADD INDEX IF NOT EXISTS "
+                    f"{index_name} {index_cols}"
+                )
+
+        # INSERT IGNORE's affected-row count already separates fresh
+        # inserts from unique-key rejects; no COUNT(*) round-trips needed
+        rows_duplicate = rows_attempted - rows_imported + rows_prefiltered
+
         logger.info("Migration complete!")
         logger.info(f"  ✓ Rows imported: {rows_imported}")
-        if rows_duplicate > 0:
+        if skip_duplicates and rows_duplicate > 0:
             logger.info(f"  - Duplicates skipped: {rows_duplicate}")
         if rows_skipped > 0:
             logger.info(f"  - Errors skipped: {rows_skipped}")
-        
+
+        admin.close()
         cursor.close()
         connection.close()
         return True
@@ -275,30 +691,102 @@ def migrate_csv(csv_file=None, skip_duplicates=True):
         return False
 
 
-def clear_table(confirm=False):
+def migrate_csv_fast(csv_file=None):
+    """
+    Bulk-load CSV data with LOAD DATA LOCAL INFILE.
+
+    The server parses the file directly, skipping per-row parameter
+    binding entirely — typically 1-2 orders of magnitude faster than
+    INSERT batches for a one-time migration. The IGNORE clause plus the
+    uq_meas unique key handles duplicate rows.
+    """
+    csv_file = csv_file or CSV_FILE
+
+    if not os.path.exists(csv_file):
+        logger.error(f"CSV file not found: {csv_file}")
+        return False
+
+    logger.info(f"Bulk loading data from {csv_file}...")
+
+    connection = get_db_connection(DB_NAME, local_infile=True)
+    if not connection:
+        return False
+
+    try:
+        # The collector CSV already matches the schema's column order;
+        # station_id may be absent in older files
+        with open(csv_file, 'r', newline='') as f:
+            header = f.readline().strip().split(',')
+        has_station = 'station_id' in header
+
+        # Nullable numerics come in as empty strings and need NULLIF
+        nullable = ['pm25', 'pm10', 'temperature', 'humidity', 'pressure', 'aqi']
+        columns = "datetime_utc, city, lat, lon, hour_utc, minute_utc, " \
+            + ", ".join(f"@{c}" for c in nullable)
+        assignments = [f"{c} = NULLIF(@{c}, '')" for c in nullable]
+        if has_station:
+            columns += ", @sid"
+            assignments.append(f"station_id = IFNULL(NULLIF(@sid, ''), {DEFAULT_STATION_ID})")
+        else:
+            assignments.append(f"station_id = {DEFAULT_STATION_ID}")
+
+        load_query = f"""
+            LOAD DATA LOCAL INFILE '{os.path.abspath(csv_file)}'
+            IGNORE INTO TABLE measurements
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+            IGNORE 1 LINES
+            ({columns})
+            SET {", ".join(assignments)}
+        """
+
+        cursor = connection.cursor()
+        # Same guard as migrate_csv: IGNORE only deduplicates if the
+        # unique key actually exists, which pre-uq_meas tables lack
+        cursor.execute(
+            "ALTER TABLE measurements ADD UNIQUE KEY IF NOT EXISTS "
+            "uq_meas (datetime_utc, city, station_id)"
+        )
+        cursor.execute(load_query)
+        connection.commit()
+        logger.info("Bulk load complete!")
+        logger.info(f"  ✓ Rows loaded: {cursor.rowcount}")
+        cursor.close()
+        connection.close()
+        return True
+
+    except MySQLError as e:
+        logger.error(f"Bulk load failed: {e}")
+        connection.rollback()
+        return False
+
+
+def clear_table(confirm=False, connection=None):
     """Clear all data from the measurements table."""
     if not confirm:
         logger.warning("Clear operation requires confirm=True")
         return False
-    
-    connection = get_db_connection(DB_NAME)
+
+    own = connection is None
+    if own:
+        connection = get_db_connection(DB_NAME)
     if not connection:
         return False
-    
+
     try:
         cursor = connection.cursor()
         cursor.execute("TRUNCATE TABLE measurements")
         connection.commit()
         logger.info("✓ Table cleared")
         cursor.close()
-        connection.close()
+        if own:
+            connection.close()
         return True
     except MySQLError as e:
         logger.error(f"Failed to clear table: {e}")
         return False
 
 
-def show_status():
+def show_status(connection=None):
     """Display current database status."""
     logger.info("=" * 50)
     logger.info("DATABASE STATUS")
@@ -306,30 +794,40 @@ def show_status():
     logger.info(f"Host: {DB_HOST}:{DB_PORT}")
     logger.info(f"Database: {DB_NAME}")
     logger.info(f"User: {DB_USER}")
-    
-    if not check_connection():
-        return
-    
-    info = get_table_info()
-    if info:
-        logger.info(f"Total records: {info['row_count']}")
-        if info['first_record']:
-            logger.info(f"First record: {info['first_record']}")
-            logger.info(f"Last record: {info['last_record']}")
+
+    with contextlib.ExitStack() as stack:
+        if connection is None:
+            connection = stack.enter_context(db())
+
+        if not check_connection(connection):
+            return
+
+        info = get_table_info(connection)
+        if info:
+            logger.info(f"Total records: {info['row_count']}")
+            if info['first_record']:
+                logger.info(f"First record: {info['first_record']}")
+                logger.info(f"Last record: {info['last_record']}")
     logger.info("=" * 50)
 
 
 def setup_all():
     """Run full database setup: create database, schema, and show status."""
     logger.info("Running full database setup...")
-    
-    if not create_database():
-        return False
-    
-    if not create_schema():
-        return False
-    
-    show_status()
+
+    # One connection for the whole sequence; create_database issues USE,
+    # so the later steps run against DB_NAME on the same link
+    with db(database=None) as connection:
+        if not connection:
+            return False
+
+        if not create_database(connection):
+            return False
+
+        if not create_schema(connection):
+            return False
+
+        show_status(connection)
     return True
 
 
@@ -342,6 +840,14 @@ def main():
                         choices=['setup', 'status', 'migrate', 'clear', 'check'],
                         help='Command to run (default: status)')
     parser.add_argument('--csv', type=str, help='CSV file path for migration')
+    parser.add_argument('--fast', action='store_true',
+                        help='Use LOAD DATA LOCAL INFILE for migration (bulk load)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Parallel loader processes for migration (default: 1)')
+    parser.add_argument('--unsafe-fast', action='store_true',
+                        help='Relax redo-log flushing server-wide during '
+                             'migration (needs SUPER; may lose ~1s of rows '
+                             'on a server crash)')
     parser.add_argument('--force', action='store_true', help='Force operation (e.g., clear without prompt)')
     
     args = parser.parse_args()
@@ -352,7 +858,11 @@ def main():
         show_status()
     elif args.command == 'migrate':
         csv_file = args.csv or CSV_FILE
-        migrate_csv(csv_file)
+        if args.fast:
+            migrate_csv_fast(csv_file)
+        else:
+            migrate_csv(csv_file, workers=args.workers,
+                        unsafe_fast=args.unsafe_fast)
     elif args.command == 'clear':
         if args.force:
             clear_table(confirm=True)